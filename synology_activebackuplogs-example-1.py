@@ -34,6 +34,9 @@ def main():
 
         # Use different filename globbing
         # filename_glob="log.txt*",
+
+        # Load the log files in parallel, one process per CPU
+        # max_workers=None,
     )
 
     # Load the log entries
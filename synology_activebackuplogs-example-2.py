@@ -68,33 +68,33 @@ def main(logger=logging.getLogger(), ago_unit='day', ago_value=1, log_path='', l
 
         try:
             # Need to check if the keys are in the event. An error is thrown if a key is accessed that does not exist.
-            if 'json' not in event or event['json'] is None:
+            event_json = event.get('json')
+            if not isinstance(event_json, dict):
                 continue
-            if 'backup_result' not in event['json']:
+            backup_result = event_json.get('backup_result')
+            if not isinstance(backup_result, dict):
                 continue
-            if 'last_success_time' not in event['json']['backup_result']:
-                continue
-            if 'last_backup_status' not in event['json']['backup_result']:
+            last_success_time = backup_result.get('last_success_time')
+            last_backup_status = backup_result.get('last_backup_status')
+            if last_success_time is None or last_backup_status is None:
                 continue
 
             # Nicely formatted timestamp
             ts = event['datetime'].strftime('%Y-%m-%d %X')
-            ts_backup = datetime.datetime.fromtimestamp(event['json']['backup_result']['last_success_time'])
+            ts_backup = datetime.datetime.fromtimestamp(last_success_time)
             delta_backup = datetime.datetime.now() - ts_backup
             # delta_backup.days is an integer and does not take into account hours.
-            if event['json']['backup_result']['last_backup_status'] == 'complete' and delta_backup.days >= 3:
+            if last_backup_status == 'complete' and delta_backup.days >= 3:
                 errors_found = True
 
             # Always print the output, so it's visible to the users.
-            task_name = ''
-            transferred = 0
-            if 'running_task_result' in event['json']:
-                if 'task_name' in event['json']['running_task_result']:
-                    task_name = event['json']['running_task_result']['task_name']
-                if 'transfered_bytes' in event['json']['running_task_result']:
-                    transferred = event['json']['running_task_result']['transfered_bytes']
-
-            print(f"{ts}: {event['json']['backup_result']}    Task name: '{task_name}'    Transferred: '{transferred}'    Days/Hours ago: {delta_backup}")
+            running_task_result = event_json.get('running_task_result')
+            if not isinstance(running_task_result, dict):
+                running_task_result = {}
+            task_name = running_task_result.get('task_name', '')
+            transferred = running_task_result.get('transfered_bytes', 0)
+
+            print(f"{ts}: {backup_result}    Task name: '{task_name}'    Transferred: '{transferred}'    Days/Hours ago: {delta_backup}")
         except TypeError as err:
             logging.warning(f'Failed to check for key before using. Skipping this event. ERR: {err}')
             logging.warning(traceback.format_exc())
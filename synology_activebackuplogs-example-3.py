@@ -56,28 +56,24 @@ def main():
     # Print the log events
     for event in found:
         # Need to check if the keys are in the event. An error is thrown if a key is accessed that does not exist.
-        if "last_success_time" not in event["json"]["backup_result"] or\
-                "last_backup_status" not in event["json"]["backup_result"]:
+        backup_result = event["json"]["backup_result"]
+        if not isinstance(backup_result, dict):
+            continue
+        last_success_time = backup_result.get("last_success_time")
+        last_backup_status = backup_result.get("last_backup_status")
+        if last_success_time is None or last_backup_status is None:
             continue
 
         # Nicely formatted timestamp
         ts = event["datetime"].strftime("%Y-%m-%d %X")
-        ts_backup = datetime.datetime.fromtimestamp(event["json"]["backup_result"]["last_success_time"])
+        ts_backup = datetime.datetime.fromtimestamp(last_success_time)
         delta_backup = datetime.datetime.now() - ts_backup
         # delta_backup.days is an integer and does not take into account hours.
-        if event["json"]["backup_result"]["last_backup_status"] != "complete":
+        if last_backup_status != "complete":
             errors_found = True
 
         # Always print the output so it's visible to the users.
-        task_name = ""
-        transfered = 0
-        if "running_task_result" in event["json"]:
-            if "task_name" in event["json"]['running_task_result']:
-                task_name = event['json']['running_task_result']['task_name']
-            if "transfered_bytes" in event["json"]['running_task_result']:
-                transfered = event['json']['running_task_result']['transfered_bytes']
-
-        print(f"{ts}: {event['json']['backup_result']}    Days/Hours ago: {delta_backup}")
+        print(f"{ts}: {backup_result}    Days/Hours ago: {delta_backup}")
         #print(event)
 
     if errors_found:
@@ -8,6 +8,10 @@
 # GitHUb: github.com/NiceGuyIT
 # URL: NiceGuyIT.biz
 #
+import concurrent.futures
+import fnmatch
+import functools
+import io
 import json
 import logging
 import os.path
@@ -54,6 +58,88 @@ except ModuleNotFoundError:
         logging.error('Automatic module installation is supported only on Windows')
         exit(1)
 
+try:
+    # orjson is optional. It parses JSON several times faster than the json module.
+    import orjson
+except ModuleNotFoundError:
+    orjson = None
+
+
+# _RE_LOG_ENTRY is a regular expression to extract the timestamp and fields from the beginning of the logs.
+_RE_LOG_ENTRY = re.compile(r'^(?P<month>\w{3}) (?P<day>\d+) (?P<time>[\d:]{8}) \[(?P<priority>\w+)\] (?P<method_name>[\w\.-]+) \((?P<method_num>\d+)\): ?(?P<message>.*)$')
+
+# _READ_BUFFER_SIZE is the buffer size in bytes used to read the log files.
+_READ_BUFFER_SIZE = 1024 * 1024
+
+# _SEEK_MIN_SIZE is the size in bytes of the log files searched for the start of the window before reading them. Smaller
+# files are read from the start.
+_SEEK_MIN_SIZE = 1024 * 1024
+
+# _SEEK_STOP_RANGE is the size in bytes of the range the search for the start of the window stops at. The rest is read.
+_SEEK_STOP_RANGE = 1024 * 1024
+
+# _PROBE_MAX_READ is the most bytes read by a probe looking for a log entry during the search. A log entry on a longer
+# line is not found by the probe.
+_PROBE_MAX_READ = 1024 * 1024
+
+# _MONTHS maps the abbreviated month names in the logs to the month number.
+_MONTHS = {month: index + 1 for index, month in enumerate(
+    ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'])}
+
+# _RE_FAKE_JSON matches strings that look like JSON but aren't. The alternatives are combined into a single regular
+# expression so the message is scanned once instead of once per alternative.
+_RE_FAKE_JSON = re.compile(r'getVolumeDetailInfo for .*Volume|Snapshot: \{|Create snapshot for')
+
+
+def find_json(message):
+    """
+    find_json will return the strings in the message that look like JSON, in order of preference. The JSON is found
+    with string searches instead of regular expressions.
+
+    Example:
+    Given the message
+        Worker (0): get event '1: routine {"subaction": "heart_beat"}', start processing
+    the JSON inside single quotes is preferred:
+        {"subaction": "heart_beat"}
+    followed by everything from the first '{"' to the last '}':
+        {"subaction": "heart_beat"}
+
+    :param message: string
+    :return candidates: list of strings
+    """
+    candidates = []
+
+    # JSON inside single quotes: '{...}'
+    start = message.find("'{")
+    end = message.rfind("}'")
+    if start >= 0 and end >= start + 2:
+        candidates.append(message[start + 1:end + 1])
+
+    # JSON from the first '{"' to the last '}'
+    start = message.find('{"')
+    end = message.rfind('}')
+    if start >= 0 and end >= start + 2:
+        candidates.append(message[start:end + 1])
+
+    return candidates
+
+
+def json_loads(json_str):
+    """
+    json_loads will parse the JSON string using orjson if it's installed, falling back to the json module.
+    orjson is always strict and rejects control characters inside strings. The json module is used with strict=False
+    for strings orjson rejects, so both produce the same results.
+
+    :param json_str: string
+    :return: parsed JSON object
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(json_str)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(json_str, strict=False)
+
 
 def fix_single_quotes(json_str):
     """
@@ -72,11 +158,27 @@ def fix_single_quotes(json_str):
     if not json_str:
         return json_str
 
-    re_left = re.compile(r'"\{')
-    re_right = re.compile(r'}"')
-    left = re.split(re_left, json_str)
+    cleaned, right = replace_single_quotes(json_str)
+    if right is not None:
+        left = json_str.split('"{')
+        logging.error('Could not fix JSON with single quotes')
+        logging.error(f'JSON string: {json_str}')
+        logging.error(f'left: {left}')
+        logging.error(f'right: {right}')
+    return cleaned
+
+
+def replace_single_quotes(json_str):
+    """
+    replace_single_quotes will do the work of fix_single_quotes without logging, so the result can be cached.
+
+    :param json_str: json_str
+    :return cleaned, right: string, and None or the list of pieces that could not be fixed
+    """
+    # The delimiters are fixed strings. str.split() doesn't need the regular expression engine.
+    left = json_str.split('"{')
     if not left:
-        return json_str
+        return json_str, None
 
     cleaned = ''
     for index, val in enumerate(left):
@@ -86,19 +188,15 @@ def fix_single_quotes(json_str):
             continue
 
         # The right should split into only 2 pieces
-        right = re.split(re_right, val)
+        right = val.split('}"')
         if len(right) != 2:
-            logging.error('Could not fix JSON with single quotes')
-            logging.error(f'JSON string: {json_str}')
-            logging.error(f'left: {left}')
-            logging.error(f'right: {right}')
-            return json_str
+            return json_str, right
 
         # The first piece is invalid and needs double quotes replaced with single quotes.
         # The second piece is valid JSON
         cleaned += '"{' + right[0].replace('"', "'") + '}"' + right[1]
 
-    return cleaned
+    return cleaned, None
 
 
 def fix_simple(json_str):
@@ -124,20 +222,296 @@ def fix_simple(json_str):
     return json_str.replace(', }', '}').replace('\\', '\\\\')
 
 
+def match_log_entry(line):
+    """
+    match_log_entry will match the line if it starts a new log entry.
+
+    :param line: string
+    :return ts_match: re.Match of _RE_LOG_ENTRY, or None if the line continues a log entry
+    """
+    # New log entries start with a timestamp like "Nov 25 22:12:34". Check the column positions and the month before
+    # running the regular expression so most continuation lines are rejected without a match attempt.
+    if len(line) > 15 and line[3] == ' ' and line[:3] in _MONTHS:
+        return _RE_LOG_ENTRY.match(line)
+    return None
+
+
+def log_entry_datetime(month, day, time, now):
+    """
+    log_entry_datetime will return the timestamp of the log entry. The logs do not contain the year. The entry is
+    from this year unless that puts it after now, in which case it's from last year.
+
+    :param month: int month of the log entry
+    :param day: int day of the log entry
+    :param time: string time of the log entry as HH:MM:SS
+    :param now: datetime.datetime used to determine if the log entry is from this year or last year
+    :return ts: datetime.datetime
+    """
+    # The format is fixed. Building the datetime directly is much faster than strptime().
+    hour, minute, second = time.split(':')
+    ts = datetime.datetime(now.year, month, day, int(hour), int(minute), int(second))
+    if now < ts:
+        # Log timestamp is in the future indicating the log entry is from last year. Subtract one year.
+        # FIXME: This does not take into account leap years. It may be off 1 day on leap years.
+        ts = ts - datetime.timedelta(days=365)
+    return ts
+
+
+def probe_timestamp(fh, position, now):
+    """
+    probe_timestamp will find the first log entry starting after the position in the binary file and return its
+    offset and timestamp. At most _PROBE_MAX_READ bytes are read, counted from the position. A line that doesn't end
+    within them is not a log entry to the probe.
+
+    :param fh: file opened in binary mode
+    :param position: int byte offset to start from. The line containing the position is skipped.
+    :param now: datetime.datetime used to determine if the log entry is from this year or last year
+    :return offset, ts: int byte offset of the log entry and its datetime.datetime, or None if no entry is found
+    """
+    fh.seek(position)
+    end = position + _PROBE_MAX_READ
+    if position > 0:
+        # Skip the rest of the line the position is in.
+        fh.readline(_PROBE_MAX_READ)
+    offset = fh.tell()
+    while offset < end:
+        line = fh.readline(end - offset)
+        if not line.endswith(b'\n'):
+            # The end of the file, or a line longer than the rest of the bytes the probe may read.
+            return None
+        ts_match = match_log_entry(line.decode('utf-8', errors='replace'))
+        if ts_match:
+            ts = log_entry_datetime(_MONTHS[ts_match['month']], int(ts_match['day']), ts_match['time'], now)
+            return offset, ts
+        offset = fh.tell()
+    return None
+
+
+def find_window_offset(fh, size, now, threshold):
+    """
+    find_window_offset will binary search the binary file for a log entry shortly before the window starts. The logs
+    are written in time order, so every entry before it is outside the window as well and doesn't need to be read.
+
+    :param fh: file opened in binary mode
+    :param size: int size of the file in bytes
+    :param now: datetime.datetime used to determine if the log entry is from this year or last year
+    :param threshold: datetime.datetime of the start of the window
+    :return offset: int byte offset of a log entry outside the window, or 0 to read the whole file
+    """
+    # low is always the start of the file or of a log entry outside the window. Moving high down is always safe; it
+    # only narrows the range that is searched.
+    low, high = 0, size
+    while high - low > _SEEK_STOP_RANGE:
+        middle = (low + high) // 2
+        probe = probe_timestamp(fh, middle, now)
+        if probe is not None and probe[1] <= threshold:
+            low = probe[0]
+        else:
+            high = middle
+    return low
+
+
+def read_log_file(log_path, now, after):
+    """
+    read_log_file will iterate over the log file and return the log entries inside the window, i.e. the entries after
+    now - after. It is a module level function so it can be run in a worker process.
+
+    Lines continuing a message at the start of the file are returned separately. They belong to the last event of the
+    previous log file. Lines continuing a log entry outside the window are skipped.
+
+    Large log files are binary searched for the start of the window, so the older entries are not read.
+
+    :param log_path: string
+    :param now: datetime.datetime used to determine if the log entry is from this year or last year
+    :param after: datetime.timedelta of how far back to search
+    :return continuation, events: list of strings, list of dict of the log entries
+    """
+    # threshold is the start of the window. It's computed once instead of for every log entry.
+    threshold = now - after
+    # threshold_day is the month and day the window starts as the number MMDD. Entries on earlier days are rejected
+    # without building the datetime. Entries from last year are always before the window if it starts this year. If the
+    # window starts last year, every entry has to be checked.
+    threshold_day = 0
+    if threshold.year == now.year:
+        threshold_day = threshold.month * 100 + threshold.day
+    continuation = []
+    events = []
+    # message_parts are the lines of the last event's message. They are joined once when the next event starts
+    # instead of copying the whole message for every continuation line.
+    message_parts = continuation
+    # Bind the globals and methods used for every line to local variables. Local lookups are faster than global and
+    # attribute lookups.
+    match_entry = _RE_LOG_ENTRY.match
+    entry_datetime = log_entry_datetime
+    months = _MONTHS
+    append_event = events.append
+    # Use the correct encoding.
+    # https://stackoverflow.com/questions/17912307/u-ufeff-in-python-string/17912811#17912811
+    #   Note that EF BB BF is a UTF-8-encoded BOM. It is not required for UTF-8, but serves only as a
+    #   signature (usually on Windows).
+    # The log files are read sequentially. A larger buffer than the default 8 KiB cuts the number of read calls.
+    with open(log_path, mode='rb', buffering=_READ_BUFFER_SIZE) as raw:
+        offset = 0
+        size = os.fstat(raw.fileno()).st_size
+        if size > _SEEK_MIN_SIZE:
+            offset = find_window_offset(raw, size, now, threshold)
+        raw.seek(offset)
+        # The BOM can only be at the start of the file.
+        fh = io.TextIOWrapper(raw, encoding='utf-8-sig' if offset == 0 else 'utf-8')
+        for line in fh:
+            # This is the check in match_log_entry(), inlined so continuation lines are rejected without a function
+            # call.
+            ts_match = None
+            if len(line) > 15 and line[3] == ' ' and line[:3] in months:
+                ts_match = match_entry(line)
+            if ts_match:
+                # New log entry. The message of the last event is complete.
+                if events and message_parts is not None and len(message_parts) > 1:
+                    events[-1]['message'] = ''.join(message_parts)
+                # message_parts is None until the entry is known to be in the window. Lines continuing an entry outside
+                # the window are skipped before they are stripped.
+                message_parts = None
+
+                # Check if the timestamp is before the threshold
+                month = months[ts_match['month']]
+                day = int(ts_match['day'])
+                if month * 100 + day < threshold_day:
+                    continue
+
+                ts = entry_datetime(month, day, ts_match['time'], now)
+
+                if threshold < ts:
+                    # Log timestamp is after the 'after' timestamp. Include it.
+                    # Always include the timestamp
+                    message_parts = [ts_match['message'].strip()]
+                    append_event({
+                        'datetime': ts,
+                        # The timestamp is the start of the line. Slicing it doesn't need to format a new string.
+                        'timestamp': line[:ts_match.end('time')],
+                        'priority': ts_match['priority'],
+                        'method_name': ts_match['method_name'],
+                        'method_num': ts_match['method_num'],
+                        'message': message_parts[0],
+                        # 'json_str': None,
+                        'json': None,
+                    })
+
+            else:
+                # Multiline log entry; append to last line
+                if message_parts is None:
+                    # The log entry is outside the window.
+                    continue
+                stripped = line.strip()
+                if not stripped:
+                    # Appending an empty line would copy the message for nothing.
+                    continue
+                message_parts.append(stripped)
+
+    if events and message_parts is not None and len(message_parts) > 1:
+        events[-1]['message'] = ''.join(message_parts)
+
+    return continuation, events
+
+
+def find_clean_json(message):
+    """
+    find_clean_json will return the strings in the message that look like JSON, in order of preference, with single
+    quotes and commas without values fixed. The logs repeat the same messages many times, heart beats for example, so
+    the results are cached by message. Strings that can't be fixed are logged for every message, cached or not.
+
+    :param message: string
+    :return candidates: tuple of strings
+    """
+    candidates, unfixed = clean_json_candidates(message)
+    for json_str in unfixed:
+        # Log the error.
+        fix_single_quotes(json_str)
+    return candidates
+
+
+@functools.lru_cache(maxsize=8192)
+def clean_json_candidates(message):
+    """
+    clean_json_candidates will do the work of find_clean_json without logging, so the result can be cached.
+
+    :param message: string
+    :return candidates, unfixed: tuple of strings, tuple of the strings single quotes could not be fixed in
+    """
+    candidates = []
+    unfixed = []
+    for candidate in find_json(message):
+        # Fix single quotes
+        # Fix commas without values
+        cleaned, right = replace_single_quotes(candidate)
+        if right is not None:
+            unfixed.append(candidate)
+        candidates.append(fix_simple(cleaned))
+    return tuple(candidates), tuple(unfixed)
+
+
+def compile_matcher(subset):
+    """
+    compile_matcher will compile the subset into a function that returns true if the subset is a subset of the
+    superset passed to it. See SynologyActiveBackupLogs.is_subset(). The structure of the subset is walked once here
+    instead of for every event searched.
+
+    Example:
+    Given the subset
+        {"priority": "ERROR", "json": {"backup_result": {}}}
+    the function returned checks
+        superset["priority"] == "ERROR" and "backup_result" in superset["json"]
+
+    :param subset: dict of the subset
+    :return match: function taking the superset and returning true if subset is a subset of the superset
+    """
+    if subset is None:
+        return lambda superset: False
+
+    if isinstance(subset, dict):
+        items = [(key, compile_matcher(val)) for key, val in subset.items()]
+
+        def match_dict(superset):
+            if superset is None:
+                return False
+            for key, match in items:
+                if key not in superset or not match(superset[key]):
+                    return False
+            return True
+        return match_dict
+
+    if isinstance(subset, list) or isinstance(subset, set):
+        matchers = [compile_matcher(subitem) for subitem in subset]
+
+        def match_list(superset):
+            if superset is None:
+                return False
+            return all(any(match(superitem) for superitem in superset) for match in matchers)
+        return match_list
+
+    # assume that subset is a plain value if none of the above match
+    def match_value(superset):
+        return superset is not None and subset == superset
+    return match_value
+
+
 class SynologyActiveBackupLogs(object):
     """
     SynologyActiveBackupLogs will consume Synology Active Backup logs, parse them and make them available for searching.
     """
+    __slots__ = ('__logger', '__log_filename_glob', '__log_path', '__now', '__after', '__max_workers', '__events')
 
     def __init__(self, after=datetime.timedelta(days=365), log_path=None, filename_glob=None,
-                 logger=None):
+                 logger=None, max_workers=1):
         """
         Initialize class parameters.
 
         :param after: datetime.timedelta of how far back to search.
         :param log_path: string path to the log files
-        :param filename_glob: string filename glob pattern for the log files
+        :param filename_glob: string filename glob pattern for the log files. The pattern is matched against the file
+            names in log_path. Patterns with a directory part, such as "archive/log.txt*", are passed to glob() instead.
         :param logger: logging instance
+        :param max_workers: int number of processes used to load the log files. 1 loads them in this process; None
+            uses one process per CPU. Scripts using more than one process need an "if __name__ == '__main__':" guard.
         """
         # Logging framework
         if logger is None:
@@ -164,22 +538,18 @@ class SynologyActiveBackupLogs(object):
         if log_path:
             self.__log_path = log_path
 
-        # __re_timestamp is a regular expression to extract the timestamp from the beginning of the logs.
-        self.__re_log_entry = re.compile(r'^(?P<month>\w{3}) (?P<day>\d+) (?P<time>[\d:]{8}) \[(?P<priority>\w+)\] (?P<method_name>[\w\.-]+) \((?P<method_num>\d+)\): ?(?P<message>.*)$')
-
         # __now is a timestamp used to determine if the log entry is after "now". 1 minute is added for
         # processing time.
         self.__now = datetime.datetime.now() + datetime.timedelta(minutes=1)
 
-        # __current_year is the current year and used to determine if the log entry is for this year or last year.
-        # The logs do not contain the year.
-        self.__current_year = self.__now.year
-
         # __after is a timestamp used to calculate if the log should be included in the search
         # Default: 1 year ago (365 days)
         if after:
             self.__after = after
 
+        # __max_workers is the number of processes used to load the log files.
+        self.__max_workers = max_workers
+
         # __events is an array of the log entries that match the search criteria.
         self.__events = []
 
@@ -193,12 +563,40 @@ class SynologyActiveBackupLogs(object):
             self.__logger.error(f'Error: Log directory does not exist: {self.__log_path}')
             return None
 
-        files = glob.glob(os.path.join(self.__log_path, self.__log_filename_glob))
-        files.sort(key=os.path.getmtime)
-        for file in files:
-            if datetime.datetime.fromtimestamp(os.path.getmtime(file)) > datetime.datetime.now() - self.__after:
+        # os.scandir() returns the file type and, on Windows, the modification time with the directory listing. This
+        # saves the stat() calls glob() and os.path.getmtime() make for every file.
+        after = (datetime.datetime.now() - self.__after).timestamp()
+        files = []
+        if '/' in self.__log_filename_glob or os.sep in self.__log_filename_glob:
+            # fnmatch only matches names in log_path. Let glob() walk the directory part of the pattern.
+            for file in glob.glob(os.path.join(self.__log_path, self.__log_filename_glob)):
+                mtime = os.path.getmtime(file)
+                if mtime > after and os.path.isfile(file):
+                    files.append((mtime, file))
+        else:
+            with os.scandir(self.__log_path) as entries:
+                for entry in entries:
+                    if entry.name.startswith('.') and not self.__log_filename_glob.startswith('.'):
+                        # glob() ignores hidden files
+                        continue
+                    if not fnmatch.fnmatch(entry.name, self.__log_filename_glob) or not entry.is_file():
+                        continue
+                    mtime = entry.stat().st_mtime
+                    if mtime > after:
+                        files.append((mtime, entry.path))
+        files = [file for mtime, file in sorted(files)]
+        if self.__max_workers == 1 or len(files) < 2:
+            for file in files:
                 self.__logger.debug(f'Processing log file: {file}')
                 self.load_log_file(file)
+            return None
+
+        # The log files are independent. Read them in worker processes and add the events in the original order.
+        self.__logger.debug(f'Processing log files: {files}')
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self.__max_workers) as executor:
+            for continuation, events in executor.map(read_log_file, files,
+                                                     [self.__now] * len(files), [self.__after] * len(files)):
+                self.__add_events(continuation, events)
 
         return None
 
@@ -209,49 +607,20 @@ class SynologyActiveBackupLogs(object):
         :param log_path: string
         :return: None
         """
-        # Use the correct encoding.
-        # https://stackoverflow.com/questions/17912307/u-ufeff-in-python-string/17912811#17912811
-        #   Note that EF BB BF is a UTF-8-encoded BOM. It is not required for UTF-8, but serves only as a
-        #   signature (usually on Windows).
-        with open(log_path, mode='r', encoding='utf-8-sig') as fh:
-            for line in fh.readlines():
-                ts_match = self.__re_log_entry.match(line)
-                if ts_match:
-                    # self.__logger.debug(f'Matched: {ts_match.groups()}')
-                    # New log entry
-                    # Check if the timestamp is before the threshold
-                    # FIXME: Use f-strings
-                    ts = datetime.datetime.strptime('{year} {month} {day} {time}'.format(
-                        month=ts_match.group('month'),
-                        day=ts_match.group('day'),
-                        time=ts_match.group('time'),
-                        year=self.__current_year,
-                    ), '%Y %b %d %X')
-                    if self.__now < ts:
-                        # Log timestamp is in the future indicating the log entry is from last year. Subtract one year.
-                        # FIXME: This does not take into account leap years. It may be off 1 day on leap years.
-                        ts = ts - datetime.timedelta(days=365)
-
-                    if self.__now - self.__after < ts:
-                        # Log timestamp is after the 'after' timestamp. Include it.
-                        # Always include the timestamp
-                        self.__events.append({
-                            'datetime': ts,
-                            'timestamp': f'{ts_match["month"]} {ts_match["day"]} {ts_match["time"]}',
-                            'priority': ts_match['priority'],
-                            'method_name': ts_match['method_name'],
-                            'method_num': ts_match['method_num'],
-                            'message': ts_match['message'].strip(),
-                            # 'json_str': None,
-                            'json': None,
-                        })
-
-                else:
-                    # Multiline log entry; append to last line
-                    if len(self.__events) == 0:
-                        # Log timestamp was before the 'after' window and nothing is captured yet.
-                        continue
-                    self.__events[len(self.__events) - 1]['message'] += line.strip()
+        continuation, events = read_log_file(log_path, self.__now, self.__after)
+        self.__add_events(continuation, events)
+
+    def __add_events(self, continuation, events):
+        """
+        __add_events will add the events read from a log file.
+
+        :param continuation: list of strings continuing the message of the last event loaded
+        :param events: list of dict of the log entries
+        :return: None
+        """
+        if continuation and self.__events:
+            self.__events[-1]['message'] += ''.join(continuation)
+        self.__events.extend(events)
 
     def parse_json(self, index):
         """
@@ -260,48 +629,37 @@ class SynologyActiveBackupLogs(object):
         :param index: int index of entry to parse
         :return: None
         """
+        # Most messages do not have JSON. A substring check is much cheaper than searching for fake JSON.
+        # JSON needs both braces.
+        message = self.__events[index]['message']
+        if '{' not in message or '}' not in message:
+            return
+
         # Ignore strings that look like JSON but aren't. This is to prevent false JSON parsing errors.
-        re_ignore_list = [
-            re.compile(r'getVolumeDetailInfo for .*Volume'),
-            re.compile(r'Snapshot: \{'),
-            re.compile(r'Create snapshot for'),
-        ]
-        for regex in re_ignore_list:
-            matches = re.search(regex, self.__events[index]['message'])
-            if matches:
-                # Fake JSON found. Don't continue the search.
-                self.__logger.debug(f'Ignoring fake JSON: {self.__events[index]["message"]}')
-                return
+        if _RE_FAKE_JSON.search(self.__events[index]['message']):
+            # Fake JSON found. Don't continue the search.
+            self.__logger.debug(f'Ignoring fake JSON: {self.__events[index]["message"]}')
+            return
 
         # If the message has what looks like JSON, extract it from the payload.
-        re_list = [
-            re.compile(r"'(?P<json>{.*})'"),
-            re.compile(r'([^{]*)(?P<json>\{".*})(.*)'),
-        ]
-        for regex in re_list:
-            matches = re.search(regex, self.__events[index]['message'])
-            if matches:
-
-                # Fix single quotes
-                # Fix commas without values
-                json_str = fix_simple(fix_single_quotes(matches['json']))
-                try:
-                    # Print the event
-                    # self.__logger.debug(f'JSON: {json_str}')
-
-                    self.__events[index]['json'] = json.loads(json_str, strict=False)
-                    # self.__logger.debug('JSON Object:', self.__events[index]['json'])
-                    # Valid JSON found. Don't need to look for more.
-                    return
-                except json.decoder.JSONDecodeError as err:
-                    self.__logger.error('ERR: Failed to parse JSON from message')
-                    self.__logger.error('Input JSON string:')
-                    self.__logger.error(json_str)
-                    self.__logger.error('Input log string:')
-                    self.__logger.error(self.__events[index]['message'])
-                    self.__logger.error(self.__events[index])
-                    self.__logger.error(err)
-                    self.__logger.error('-----')
+        for json_str in find_clean_json(message):
+            try:
+                # Print the event
+                # self.__logger.debug(f'JSON: {json_str}')
+
+                self.__events[index]['json'] = json_loads(json_str)
+                # self.__logger.debug('JSON Object:', self.__events[index]['json'])
+                # Valid JSON found. Don't need to look for more.
+                return
+            except json.decoder.JSONDecodeError as err:
+                self.__logger.error('ERR: Failed to parse JSON from message')
+                self.__logger.error('Input JSON string:')
+                self.__logger.error(json_str)
+                self.__logger.error('Input log string:')
+                self.__logger.error(self.__events[index]['message'])
+                self.__logger.error(self.__events[index])
+                self.__logger.error(err)
+                self.__logger.error('-----')
 
     def search(self, find):
         """
@@ -318,9 +676,20 @@ class SynologyActiveBackupLogs(object):
         #     for x in range(len(self.__events)):
         #         print(self.__events[x])
         #     print()
+        # Comparing the fields from the log line is cheap. Parsing the JSON is not, so search in two passes: first
+        # the fields without the JSON, then the JSON only for the events that matched.
+        # find is the same for every event. Compile it into matcher functions once.
+        match_fields, match_json = compile_matcher(find), None
+        if isinstance(find, dict) and 'json' in find:
+            match_fields = compile_matcher({key: val for key, val in find.items() if key != 'json'})
+            match_json = compile_matcher({'json': find['json']})
         for x in range(len(self.__events)):
+            if not match_fields(self.__events[x]):
+                # Event doesn't match search. Remove it
+                self.__events[x] = None
+                continue
             self.parse_json(index=x)
-            if not self.is_subset(find, self.__events[x]):
+            if match_json is not None and not match_json(self.__events[x]):
                 # Event doesn't match search. Remove it
                 self.__events[x] = None
         # self.__events = [x for x in range(len(self.__events)) if not self.is_subset(find, self.__events[x])]
@@ -338,7 +707,8 @@ class SynologyActiveBackupLogs(object):
         #     print()
         return self.__events
 
-    def is_subset(self, subset, superset):
+    @staticmethod
+    def is_subset(subset, superset):
         """
         is_subset will recursively compare two dictionaries and return true if subset is a subset of the superset.
         See https://stackoverflow.com/a/57675231
@@ -351,10 +721,20 @@ class SynologyActiveBackupLogs(object):
             return False
 
         if isinstance(subset, dict):
-            return all(key in superset and self.is_subset(val, superset[key]) for key, val in subset.items())
+            if not isinstance(superset, dict):
+                return all(key in superset and SynologyActiveBackupLogs.is_subset(val, superset[key])
+                           for key, val in subset.items())
+            for key, val in subset.items():
+                # Look up each key once. A missing key and a None value are both not a match, so get() doesn't need
+                # a sentinel.
+                superval = superset.get(key)
+                if superval is None or not SynologyActiveBackupLogs.is_subset(val, superval):
+                    return False
+            return True
 
         if isinstance(subset, list) or isinstance(subset, set):
-            return all(any(self.is_subset(subitem, superitem) for superitem in superset) for subitem in subset)
+            return all(any(SynologyActiveBackupLogs.is_subset(subitem, superitem) for superitem in superset)
+                       for subitem in subset)
 
         # assume that subset is a plain value if none of the above match
         return subset == superset